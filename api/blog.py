@@ -1,11 +1,15 @@
 import re
-from typing import List
-from fastapi import APIRouter,Depends,HTTPException,status
+from uuid import UUID
+from typing import List, Optional
+from fastapi import APIRouter,Depends,HTTPException,status,Header
+from fastapi.encoders import jsonable_encoder
 from database import models
 from sqlalchemy.orm import Session
 from database.db import get_db
 from database.schema import BlogResponse, UserResponse,BlogCreate
 from auth.auth import get_current_user
+from api.idempotency import fingerprint, run_idempotent
+from jobs.queue import enqueue
 
 
 blog_router = APIRouter()
@@ -65,7 +69,7 @@ async def read_your_blogs(db: Session = Depends(get_db),user:UserResponse = Depe
 
 
 @blog_router.get("/blog/{id}",response_model=BlogResponse )
-async def read_blog(id: str,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
+async def read_blog(id: UUID,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
     """
     Retrieve a blog by ID.
 
@@ -74,7 +78,7 @@ async def read_blog(id: str,db: Session = Depends(get_db),user:UserResponse = De
 
     Parameters:
     ----------
-    id : str
+    id : UUID
         The ID of the blog to retrieve.
     db : Session
         The database session dependency.
@@ -97,10 +101,11 @@ async def read_blog(id: str,db: Session = Depends(get_db),user:UserResponse = De
     return blog
     
 @blog_router.post("/blog",response_model= BlogResponse,status_code=status.HTTP_201_CREATED)     
-async def create_blog(blog: BlogCreate,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
+async def create_blog(blog: BlogCreate,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user),idempotency_key: Optional[str] = Header(None)):
     """
     Create a new blog.
     This endpoint is accessible to any authenticated user. It returns the newly created blog.
+    Retries carrying the same Idempotency-Key header return the originally created blog.
     Parameters:
     ----------
     blog : BlogCreate
@@ -109,28 +114,34 @@ async def create_blog(blog: BlogCreate,db: Session = Depends(get_db),user:UserRe
         The database session dependency.
     user : UserResponse
         The currently authenticated user dependency.
+    idempotency_key : Optional[str]
+        The Idempotency-Key header.
 
     Returns:
     -------
     BlogResponse
         The newly created blog.
     """
-    new_blog = models.Blog(title=blog.title,body=blog.body,user_id=user.id)
-    db.add(new_blog)
-    db.commit()
-    db.refresh(new_blog)
-    return new_blog
+    async def create():
+        new_blog = models.Blog(title=blog.title,body=blog.body,user_id=user.id)
+        db.add(new_blog)
+        db.flush()
+        enqueue(db, "count_words", {"blog_id": new_blog.id}, dedup_key=f"count_words:{new_blog.id}")
+        return jsonable_encoder(BlogResponse.model_validate(new_blog, from_attributes=True))
+
+    scope = f"POST /blog:{user.id}"
+    return await run_idempotent(db, idempotency_key, scope, fingerprint(scope, blog.model_dump()), create)
 
 
 @blog_router.put("/blog/{id}",response_model=BlogResponse)
-async def update_blog(id: str,blog: BlogCreate,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
+async def update_blog(id: UUID,blog: BlogCreate,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
     """
     Update a blog by ID.
     This endpoint is accessible to the blog owner, moderator and admin.
     It returns the updated blog.
     Parameters:
     ----------
-    id : str
+    id : UUID
         The ID of the blog to update.
     blog : BlogCreate
         The updated blog.
@@ -151,8 +162,12 @@ async def update_blog(id: str,blog: BlogCreate,db: Session = Depends(get_db),use
     if blog_to_update is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="blog not found")
     if user.role == "admin" or blog_to_update.user_id == user.id or user.role == "moderator":
+        previous_hash = blog_to_update.body_hash
         blog_to_update.title = blog.title
         blog_to_update.body = blog.body
+        if previous_hash is not None and previous_hash != blog_to_update.body_hash:
+            enqueue(db, "purge_blog_contents", {}, dedup_key="purge_blog_contents")
+        enqueue(db, "count_words", {"blog_id": blog_to_update.id}, dedup_key=f"count_words:{blog_to_update.id}")
         db.commit()
         db.refresh(blog_to_update)
         return blog_to_update
@@ -160,7 +175,7 @@ async def update_blog(id: str,blog: BlogCreate,db: Session = Depends(get_db),use
 
 
 @blog_router.delete("/blog/{id}")
-async def delete_blog(id: str,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
+async def delete_blog(id: UUID,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
     """
     Delete a blog by ID.
 
@@ -169,7 +184,7 @@ async def delete_blog(id: str,db: Session = Depends(get_db),user:UserResponse =
 
     Parameters:
     ----------
-    id : str
+    id : UUID
         The ID of the blog to delete.
     db : Session
         The database session dependency.
@@ -190,6 +205,8 @@ async def delete_blog(id: str,db: Session = Depends(get_db),user:UserResponse =
     if blog_to_delete is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="blog not found")
     if user.role == "admin" or blog_to_delete.user_id == user.id or user.role == "moderator":
+        if blog_to_delete.body_hash is not None:
+            enqueue(db, "purge_blog_contents", {}, dedup_key="purge_blog_contents")
         db.delete(blog_to_delete)
         db.commit()
         return {"message": "Blog deleted successfully"}
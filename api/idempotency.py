@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import models
+from database.db import SessionLocal
+
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_WAIT_TIMEOUT = 30
+IDEMPOTENCY_CLAIM_GRACE = 5
+IDEMPOTENCY_POLL_INTERVAL = 0.1
+IDEMPOTENCY_CACHE_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Returns a stable digest of the request parts (route, caller, payload),
+    used to detect an Idempotency-Key being reused for a different request.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _cache_get(key: str):
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    if entry[2] < datetime.now() - IDEMPOTENCY_KEY_TTL:
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return entry
+
+
+def _cache_put(key: str, request_fingerprint: str, response: Any, created_at: datetime):
+    _cache[key] = (request_fingerprint, response, created_at)
+    if len(_cache) > IDEMPOTENCY_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _replay(request_fingerprint: str, stored_fingerprint: str, response: Any):
+    if stored_fingerprint != request_fingerprint:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,detail="Idempotency-Key was already used for a different request")
+    return response
+
+
+async def _claim(db: Session, key: str, request_fingerprint: str):
+    """
+    Inserts the key as an in-progress claim. If another request already holds
+    it, waits until that request stores its response and returns the stored row.
+    Returns None when this request owns the claim.
+
+    The owner of a claim holds a row lock on it while its handler runs. A
+    claim older than IDEMPOTENCY_CLAIM_GRACE seconds that has no response and
+    that nobody has locked belongs to a request that died. Because the response
+    is written in the same transaction as the handler's changes, that request
+    committed nothing, and a waiter takes the claim over. A claim that is
+    still locked is never taken over: the waiter gets 409 after
+    IDEMPOTENCY_WAIT_TIMEOUT seconds.
+    """
+    db.add(models.IdempotencyKey(key=key, fingerprint=request_fingerprint, created_at=datetime.now()))
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    waited = 0.0
+    while True:
+        record = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+        if record is None:
+            db.rollback()
+            # the first request failed and released its claim
+            return await _claim(db, key, request_fingerprint)
+        if record.response is not None:
+            return record
+        claimed_at = record.created_at
+        db.rollback()
+        if claimed_at < datetime.now() - timedelta(seconds=IDEMPOTENCY_CLAIM_GRACE):
+            abandoned = (
+                db.query(models.IdempotencyKey)
+                .filter(models.IdempotencyKey.key == key, models.IdempotencyKey.response.is_(None))
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if abandoned is not None:
+                db.delete(abandoned)
+                db.commit()
+                return await _claim(db, key, request_fingerprint)
+            db.rollback()
+        if waited >= IDEMPOTENCY_WAIT_TIMEOUT:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+        waited += IDEMPOTENCY_POLL_INTERVAL
+
+
+async def run_idempotent(db: Session, idempotency_key: Optional[str], scope: str, request_fingerprint: str, handler: Callable[[], Awaitable[Any]]):
+    """
+    Runs the handler at most once per Idempotency-Key.
+
+    The JSON-serializable result of the first request is stored in the
+    idempotency_keys table (fronted by an in-process LRU cache) and returned
+    as-is on retries. Concurrent duplicates wait for the first request to finish
+    instead of running the handler again. Without a key the handler simply runs.
+
+    Parameters:
+    ----------
+    db : Session
+        The database session dependency.
+    idempotency_key : Optional[str]
+        The value of the Idempotency-Key header.
+    scope : str
+        Namespaces the key, e.g. the route and the caller.
+    request_fingerprint : str
+        Digest of the request, see `fingerprint`.
+    handler : Callable
+        Coroutine function performing the actual work. It flushes its changes
+        but does not commit; the changes are committed together with the
+        stored response.
+
+    Raises:
+    ------
+    HTTPException
+        422 if the key was used for a different request, 409 if the first
+        request is still running after IDEMPOTENCY_WAIT_TIMEOUT seconds.
+    """
+    if idempotency_key is None:
+        response = await handler()
+        db.commit()
+        return response
+    key = hashlib.sha256(f"{scope}:{idempotency_key}".encode()).hexdigest()
+
+    entry = _cache_get(key)
+    if entry is not None:
+        return _replay(request_fingerprint, entry[0], entry[1])
+
+    lock = _locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            entry = _cache_get(key)
+            if entry is not None:
+                return _replay(request_fingerprint, entry[0], entry[1])
+
+            record = await _claim(db, key, request_fingerprint)
+            if record is not None:
+                response = json.loads(record.response)
+                _cache_put(key, record.fingerprint, response, record.created_at)
+                return _replay(request_fingerprint, record.fingerprint, response)
+
+            try:
+                # held until the commit below; tells waiters this request is alive
+                db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).with_for_update().first()
+                response = await handler()
+            except BaseException:
+                db.rollback()
+                db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).delete()
+                db.commit()
+                raise
+            db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).update({"response": json.dumps(response)}, synchronize_session=False)
+            db.commit()
+            _cache_put(key, request_fingerprint, response, datetime.now())
+            return response
+    finally:
+        if not lock.locked() and _locks.get(key) is lock:
+            del _locks[key]
+
+
+def purge_expired_idempotency_keys(db: Session) -> int:
+    """
+    Deletes idempotency keys older than IDEMPOTENCY_KEY_TTL.
+    Returns the number of deleted rows.
+    """
+    cutoff = datetime.now() - IDEMPOTENCY_KEY_TTL
+    deleted = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.created_at < cutoff).delete()
+    db.commit()
+    return deleted
+
+
+def _run_cleanup():
+    db = SessionLocal()
+    try:
+        purge_expired_idempotency_keys(db)
+    finally:
+        db.close()
+
+
+async def idempotency_cleanup_job(interval: float = 3600):
+    """
+    Periodically purges expired idempotency keys. Started with the app; the
+    delete runs in a thread so it does not block request handling.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(_run_cleanup)
+        except Exception:
+            logger.exception("Purging expired idempotency keys failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from database import models
+from database.db import SessionLocal
+from jobs.queue import enqueue
+
+
+PURGE_BATCH_SIZE = 500
+PURGE_BATCH_DELAY = 0.2
+PURGE_POLL_INTERVAL = 5
+PURGE_LEASE = timedelta(minutes=1)
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_user_purge(db: Session, user: models.User):
+    """
+    Marks the user as deleted and records a purge job for their blogs.
+    The caller commits.
+    """
+    now = datetime.now()
+    user.deleted_at = now
+    user.is_active = False
+    if db.get(models.UserPurge, user.id) is None:
+        db.add(models.UserPurge(user_id=user.id, status="pending", blogs_deleted=0, created_at=now, updated_at=now))
+
+
+def _claim_purge(db: Session):
+    """
+    Leases the next unfinished purge job, or returns None. A job whose worker
+    crashed becomes claimable again once its lease runs out, and resumes where
+    it stopped since every batch is committed on its own.
+    """
+    now = datetime.now()
+    job = (
+        db.query(models.UserPurge)
+        .filter(models.UserPurge.status != "done")
+        .filter(or_(models.UserPurge.locked_until.is_(None), models.UserPurge.locked_until < now))
+        .order_by(models.UserPurge.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+    job.status = "running"
+    job.locked_until = now + PURGE_LEASE
+    db.commit()
+    return job
+
+
+def purge_batch(db: Session, job: models.UserPurge) -> int:
+    """
+    Deletes up to PURGE_BATCH_SIZE of the user's blogs in one short transaction,
+    records the progress and renews the lease. Returns the number of deleted blogs.
+    """
+    batch = db.query(models.Blog.id).filter(models.Blog.user_id == job.user_id).limit(PURGE_BATCH_SIZE)
+    deleted = db.query(models.Blog).filter(models.Blog.id.in_(batch.scalar_subquery())).delete(synchronize_session=False)
+    now = datetime.now()
+    job.blogs_deleted = models.UserPurge.blogs_deleted + deleted
+    if deleted:
+        enqueue(db, "purge_blog_contents", {}, dedup_key="purge_blog_contents")
+    job.updated_at = now
+    job.locked_until = now + PURGE_LEASE
+    if deleted == 0:
+        db.query(models.User).filter(models.User.id == job.user_id).delete()
+        job.status = "done"
+        job.finished_at = now
+        job.locked_until = None
+    db.commit()
+    return deleted
+
+
+def _lock_leased_purge(db: Session, lease):
+    """
+    Locks the purge this worker leased, or returns None if the lease was lost:
+    the purge finished or, after the lease ran out, another worker claimed it
+    and set its own locked_until, which therefore serves as the lease token.
+    """
+    user_id, locked_until = lease
+    job = (
+        db.query(models.UserPurge)
+        .filter(
+            models.UserPurge.user_id == user_id,
+            models.UserPurge.status != "done",
+            models.UserPurge.locked_until == locked_until,
+        )
+        .with_for_update()
+        .first()
+    )
+    if job is None:
+        db.rollback()
+    return job
+
+
+def run_purge_batch(lease=None):
+    """
+    Runs one batch of the purge held under `lease`, or of a newly claimed
+    purge, in its own session. Returns the lease, a (user_id, locked_until)
+    pair, to continue with, or None when the purge finished, the lease was
+    lost, or no purge was pending.
+    """
+    db = SessionLocal()
+    try:
+        job = _claim_purge(db) if lease is None else _lock_leased_purge(db, lease)
+        if job is None:
+            return None
+        user_id = job.user_id
+        if purge_batch(db, job) == 0:
+            return None
+        return user_id, job.locked_until
+    finally:
+        db.close()
+
+
+async def user_purge_worker():
+    """
+    Runs pending user purges one batch at a time. Batches run in a thread so
+    the deletes never block request handling, and the worker sleeps
+    PURGE_BATCH_DELAY between batches so their locks and WAL never stall live
+    traffic. Started with the app.
+    """
+    lease = None
+    while True:
+        try:
+            lease = await asyncio.to_thread(run_purge_batch, lease)
+        except Exception:
+            logger.exception("Purging user %s failed", lease[0] if lease else None)
+            lease = None
+            await asyncio.sleep(PURGE_POLL_INTERVAL)
+            continue
+        await asyncio.sleep(PURGE_BATCH_DELAY if lease is not None else PURGE_POLL_INTERVAL)
@@ -1,12 +1,14 @@
 from calendar import c
 from turtle import up
+from uuid import UUID
 from typing import List
 from fastapi import APIRouter,Depends,HTTPException,status
 from database import models
 from sqlalchemy.orm import Session
 from database.db import get_db
-from database.schema import UpdateUser, UserResponse
+from database.schema import UpdateUser, UserResponse, UserPurgeResponse
 from auth.auth import get_current_user, get_password_hash
+from api.user_purge import schedule_user_purge
 
 user_router = APIRouter()
 
@@ -21,7 +23,7 @@ async def read_users(db: Session = Depends(get_db),user:UserResponse = Depends(g
         A list of all users.
     """
     if user.role == "admin":
-        users = db.query(models.User).all()
+        users = db.query(models.User).filter(models.User.deleted_at.is_(None)).all()
         return users
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Only Admin can access this route")
 
@@ -39,13 +41,13 @@ async def read_users_me(current_user: UserResponse = Depends(get_current_user)):
 
 
 @user_router.get('/users/{id}',response_model=UserResponse)
-async def read_user(id: str,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
+async def read_user(id: UUID,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
     """
     Get a user by ID.
     Requires authentication with an admin role.
     Parameters:
     ----------
-    id : str
+    id : UUID
         The ID of the user to retrieve.
     db : Session
         The database session dependency.
@@ -61,18 +63,23 @@ async def read_user(id: str,db: Session = Depends(get_db),user:UserResponse = De
         If the user is not found, or if the current user is not authorized to retrieve the user.
     """
     if user.role == "admin":
-        users = db.query(models.User).filter(models.User.id == id).first()
+        users = db.query(models.User).filter(models.User.id == id, models.User.deleted_at.is_(None)).first()
+        if users is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="user not found")
         return users
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Only Admin can access this route")
 
-@user_router.delete('/users/{id}')
-async def delete_user(id: str,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
+@user_router.delete('/users/{id}',status_code=status.HTTP_202_ACCEPTED)
+async def delete_user(id: UUID,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
     """
     Delete a user by ID.
     Requires authentication with an admin role.
+    The account is marked deleted immediately; the user's blogs and the user row
+    are purged in batches by a background worker. Progress is reported by
+    `GET /users/{id}/deletion`.
     Parameters:
     ----------
-    id : str
+    id : UUID
         The ID of the user to be deleted.
     db : Session
         The database session dependency.
@@ -81,7 +88,7 @@ async def delete_user(id: str,db: Session = Depends(get_db),user:UserResponse =
     Returns:
     -------
     dict
-        A message indicating the successful deletion of the user.
+        A message indicating the user is scheduled for deletion.
     Raises:
     ------
     HTTPException
@@ -91,11 +98,40 @@ async def delete_user(id: str,db: Session = Depends(get_db),user:UserResponse =
         user_to_delete = db.query(models.User).filter(models.User.id == id).first()
         if user_to_delete is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="user not found")
-        db.delete(user_to_delete)
+        schedule_user_purge(db, user_to_delete)
         db.commit()
-        return {"message": "User deleted successfully"}
+        return {"message": "User scheduled for deletion", "status_url": f"/users/{id}/deletion"}
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="You are not authorized to delete this user")
 
+@user_router.get('/users/{id}/deletion',response_model=UserPurgeResponse)
+async def read_user_deletion(id: UUID,db: Session = Depends(get_db),user:UserResponse = Depends(get_current_user)):
+    """
+    Get the progress of a user's deletion.
+    Requires authentication with an admin role.
+    Parameters:
+    ----------
+    id : UUID
+        The ID of the deleted user.
+    db : Session
+        The database session dependency.
+    user : UserResponse
+        The currently authenticated user dependency.
+    Returns:
+    -------
+    UserPurgeResponse
+        The status of the purge and the number of blogs deleted so far.
+    Raises:
+    ------
+    HTTPException
+        If no deletion is scheduled for the user, or if the current user is not an admin.
+    """
+    if user.role == "admin":
+        purge = db.query(models.UserPurge).filter(models.UserPurge.user_id == id).first()
+        if purge is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="no deletion scheduled for this user")
+        return purge
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Only Admin can access this route")
+
 @user_router.put('/users/me',response_model=UserResponse)
 async def update_user_me(updated_data:UpdateUser,db: Session = Depends(get_db),current_user:UserResponse = Depends(get_current_user)):
     """
@@ -131,13 +167,13 @@ async def update_user_me(updated_data:UpdateUser,db: Session = Depends(get_db),c
 
 
 @user_router.put('/users/{id}',response_model=UserResponse)
-async def update_user_role(id: str,user: UserResponse,db: Session = Depends(get_db),current_user:UserResponse = Depends(get_current_user)):
+async def update_user_role(id: UUID,user: UserResponse,db: Session = Depends(get_db),current_user:UserResponse = Depends(get_current_user)):
     """
     Update a user's role.
     Requires authentication with an admin role.
     Parameters:
     ----------
-    id : str
+    id : UUID
         The user ID to update.
     user : UserResponse
         The updated user data.
@@ -155,7 +191,7 @@ async def update_user_role(id: str,user: UserResponse,db: Session = Depends(get_
         If the user is not found, or if the current user is not authorized to update the user.
     """
     if current_user.role == "admin":
-        user_to_update = db.query(models.User).filter(models.User.id == id).first()
+        user_to_update = db.query(models.User).filter(models.User.id == id, models.User.deleted_at.is_(None)).first()
         if user_to_update is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="user not found")
         user_to_update.role = user.role
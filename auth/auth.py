@@ -1,7 +1,12 @@
-from typing import List
+from typing import List, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import time
 import jwt
 import os
-from fastapi import Depends,HTTPException, status, APIRouter
+from fastapi import Depends,HTTPException, status, APIRouter, Header
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
@@ -10,14 +15,25 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from database.db import get_db
 from database import models
 from database.schema import Token, UserCreate, UserResponse
+from api.idempotency import fingerprint, run_idempotent
 
 auth_router = APIRouter()
 
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here")
-ALGORITHM = "HS256"
+ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Asymmetric signing (EdDSA / RS256). Tokens are signed with the private key
+# in JWT_PRIVATE_KEY_FILE and carry its JWT_SIGNING_KID in the header; they are
+# verified against the public keys in JWKS_FILE, so rotating a key only means
+# adding it to the JWKS file before switching the kid.
+JWKS_FILE = os.environ.get("JWKS_FILE")
+JWT_PRIVATE_KEY_FILE = os.environ.get("JWT_PRIVATE_KEY_FILE")
+JWT_SIGNING_KID = os.environ.get("JWT_SIGNING_KID")
+
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "1024"))
+
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -28,6 +44,91 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+JWKS_RELOAD_INTERVAL = 30
+
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_jwks = None
+_jwks_mtime = None
+_jwks_checked_at = 0.0
+_private_key = None
+
+
+def _load_jwks(force: bool = False):
+    """
+    Loads the public keys from JWKS_FILE, keyed by their "kid".
+    The file is re-read when its modification time changes; the check runs at
+    most every JWKS_RELOAD_INTERVAL seconds unless `force` is set, which is
+    used when a token names an unknown kid.
+    """
+    global _jwks, _jwks_mtime, _jwks_checked_at
+    now = time.monotonic()
+    if _jwks is not None and not force and now - _jwks_checked_at < JWKS_RELOAD_INTERVAL:
+        return _jwks
+    _jwks_checked_at = now
+    mtime = os.stat(JWKS_FILE).st_mtime
+    if _jwks is None or mtime != _jwks_mtime:
+        with open(JWKS_FILE) as f:
+            jwk_set = jwt.PyJWKSet.from_dict(json.load(f))
+        _jwks = {key.key_id: key for key in jwk_set.keys}
+        _jwks_mtime = mtime
+    return _jwks
+
+
+def _signing_key():
+    global _private_key
+    if ALGORITHM.startswith("HS"):
+        return SECRET_KEY, {}
+    if _private_key is None:
+        with open(JWT_PRIVATE_KEY_FILE, "rb") as f:
+            _private_key = f.read()
+    return _private_key, {"kid": JWT_SIGNING_KID}
+
+
+def _verification_key(token: str, kid: Optional[str]):
+    if ALGORITHM.startswith("HS"):
+        return SECRET_KEY
+    key = _load_jwks().get(kid)
+    if key is None and time.monotonic() - _jwks_checked_at >= 1:
+        # the key may have been added since the last check; force=True still
+        # reads the file at most once a second for repeated unknown kids
+        key = _load_jwks(force=True).get(kid)
+    if key is None:
+        raise jwt.InvalidKeyError(f"Unknown key id: {kid}")
+    return key.key
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decodes and verifies a JWT access token, returning its claims.
+
+    Verified claims are kept in an LRU cache keyed by the SHA-256 digest of the
+    token until the token's "exp", so repeated requests with the same token
+    skip signature verification. The signing key's "kid" is cached alongside,
+    and a hit whose kid has since been removed from JWKS_FILE is verified
+    again, so revoking a key also rejects its cached tokens.
+
+    Raises:
+        jwt.PyJWTError: If the token is invalid or expired.
+    """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    cached = _token_cache.get(digest)
+    if cached is not None:
+        payload, kid = cached
+        key_present = ALGORITHM.startswith("HS") or kid in _load_jwks()
+        if payload["exp"] > time.time() and key_present:
+            _token_cache.move_to_end(digest)
+            return payload
+        del _token_cache[digest]
+
+    kid = None if ALGORITHM.startswith("HS") else jwt.get_unverified_header(token).get("kid")
+    payload = jwt.decode(token, _verification_key(token, kid), algorithms=[ALGORITHM])
+    if "exp" in payload:
+        _token_cache[digest] = (payload, kid)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
+
+
 def create_access_token(data: dict):
     """
     Creates a JWT access token for the given data.
@@ -45,14 +146,16 @@ def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    key, headers = _signing_key()
+    return jwt.encode(to_encode, key, algorithm=ALGORITHM, headers=headers)
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """
     Returns the current user based on the token passed in the Authorization header,
     or raises a 401 Unauthorized response if the token is invalid or the user is not found.
 
-    The token is expected to be in the format of a JWT token, signed with the SECRET_KEY.
+    The token is expected to be in the format of a JWT token, signed with the SECRET_KEY,
+    or, for asymmetric algorithms, with a key listed in JWKS_FILE under its "kid".
     The payload of the token is expected to have a "sub" key with the email of the user.
 
     If the token is invalid or the user is not found, a 401 Unauthorized response is raised.
@@ -63,7 +166,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -71,18 +174,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     
     user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
+    if user is None or user.deleted_at is not None:
         raise credentials_exception
     return user
 
 
-@auth_router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+@auth_router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(user: UserCreate, db: Session = Depends(get_db), idempotency_key: Optional[str] = Header(None)):
     """
     Register a new user.
+    Retries carrying the same Idempotency-Key header return the originally
+    registered user without hashing the password again.
 
     Args:
         user: The user to register.
+        idempotency_key: The Idempotency-Key header.
 
     Raises:
         HTTPException: If the user's email is already registered.
@@ -90,21 +196,25 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     Returns:
         The registered user.
     """
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    hashed_password = get_password_hash(user.password)
-    db_user = models.User(
-        email=user.email,
-        hashed_password=hashed_password,
-        role=user.role,
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    async def create():
+        db_user = db.query(models.User).filter(models.User.email == user.email).first()
+        if db_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+        hashed_password = get_password_hash(user.password)
+        db_user = models.User(
+            email=user.email,
+            hashed_password=hashed_password,
+            role=user.role,
+        )
+
+        db.add(db_user)
+        db.flush()
+        return jsonable_encoder(UserResponse.model_validate(db_user, from_attributes=True))
+
+    # the password is left out so its digest is never persisted
+    scope = "POST /register"
+    return await run_idempotent(db, idempotency_key, scope, fingerprint(scope, user.model_dump(exclude={"password"})), create)
 
 
 @auth_router.post("/token", response_model=Token)
@@ -119,7 +229,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
         The access token and its type.
     """
     user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or user.deleted_at is not None or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
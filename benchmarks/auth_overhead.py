@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of the per-request overhead of the get_current_user dependency.
+
+Runs against an in-memory SQLite database and reports, per signing algorithm,
+the cost of verifying a token (cold token cache) against a cached token, and
+of the full dependency including the user lookup.
+
+Usage:
+    python -m benchmarks.auth_overhead [--number N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+import jwt
+
+from auth import auth
+from database import models
+from database.db import SessionLocal
+
+
+def use_eddsa(directory: str):
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    private_path = os.path.join(directory, "private.pem")
+    with open(private_path, "wb") as f:
+        f.write(private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    jwk = json.loads(jwt.algorithms.OKPAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": "bench", "alg": "EdDSA", "use": "sig"})
+    jwks_path = os.path.join(directory, "jwks.json")
+    with open(jwks_path, "w") as f:
+        json.dump({"keys": [jwk]}, f)
+    auth.ALGORITHM = "EdDSA"
+    auth.JWT_PRIVATE_KEY_FILE = private_path
+    auth.JWT_SIGNING_KID = "bench"
+    auth.JWKS_FILE = jwks_path
+    auth._private_key = None
+    auth._jwks = None
+
+
+def report(label: str, seconds: float, number: int):
+    print(f"{label:<40} {seconds / number * 1e6:10.1f} us/request")
+
+
+def bench(algorithm: str, number: int):
+    token = auth.create_access_token({"sub": "bench@example.com"})
+
+    def cold():
+        auth._token_cache.clear()
+        auth.decode_access_token(token)
+
+    def cached():
+        auth.decode_access_token(token)
+
+    db = SessionLocal()
+    loop = asyncio.new_event_loop()
+
+    def dependency():
+        loop.run_until_complete(auth.get_current_user(token, db))
+
+    print(algorithm)
+    report("  decode, cold cache", timeit.timeit(cold, number=number), number)
+    report("  decode, cached", timeit.timeit(cached, number=number), number)
+    report("  get_current_user, cached", timeit.timeit(dependency, number=number), number)
+    loop.close()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.auth_overhead")
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    db.add(models.User(email="bench@example.com", hashed_password="x", role="user"))
+    db.commit()
+    db.close()
+
+    bench("HS256", args.number)
+    with tempfile.TemporaryDirectory() as directory:
+        use_eddsa(directory)
+        bench("EdDSA", args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark of blog body storage: bytes stored and body read latency with
+plain bodies against zstd-compressed, deduplicated bodies.
+
+Runs against an in-memory SQLite database. The corpus mixes unique long
+posts with reposted (identical) ones to show the effect of deduplication.
+
+Usage:
+    python -m benchmarks.blog_storage [--blogs N] [--body-size BYTES]
+"""
+import argparse
+import os
+import random
+import timeit
+import uuid
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import func
+
+from database import content, models
+from database.db import SessionLocal
+
+WORDS = ("the quick brown fox jumps over a lazy dog while performance engineers "
+         "measure latency throughput storage compression and replication costs").split()
+
+
+def make_body(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def populate(compressed: bool, bodies):
+    content.BODY_COMPRESSION = compressed
+    db = SessionLocal()
+    db.query(models.Blog).delete()
+    db.query(models.BlogContent).delete()
+    user_id = uuid.uuid4()
+    ids = []
+    for body in bodies:
+        blog = models.Blog(title="benchmark", body=body, user_id=user_id)
+        db.add(blog)
+        db.flush()
+        ids.append(blog.id)
+    db.commit()
+    stored = (db.query(func.coalesce(func.sum(func.length(models.Blog._body)), 0)).scalar()
+              + db.query(func.coalesce(func.sum(func.length(models.BlogContent.data)), 0)).scalar())
+    db.close()
+    return ids, stored
+
+
+def read_latency(ids, number: int) -> float:
+    def read():
+        db = SessionLocal()
+        for id in ids[:number]:
+            db.query(models.Blog).filter(models.Blog.id == id).first().body
+        db.close()
+    return timeit.timeit(read, number=1) / min(number, len(ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.blog_storage")
+    parser.add_argument("--blogs", type=int, default=1000)
+    parser.add_argument("--body-size", type=int, default=16384)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of blogs reposting an earlier body")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    bodies = []
+    for _ in range(args.blogs):
+        if bodies and rng.random() < args.duplicates:
+            bodies.append(rng.choice(bodies))
+        else:
+            bodies.append(make_body(rng, args.body_size))
+    raw = sum(len(body.encode()) for body in bodies)
+    print(f"{args.blogs} blogs, {raw / 1e6:.1f} MB of body text")
+
+    for label, compressed in (("plain", False), ("compressed", True)):
+        ids, stored = populate(compressed, bodies)
+        latency = read_latency(ids, 500)
+        print(f"{label:<12} stored {stored / 1e6:8.2f} MB   read {latency * 1e6:8.1f} us/body")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of every route of the auth, user and blog routers against an
+in-memory SQLite database, set up with the same harness as the test suite
+(tests/harness.py): a fresh engine bound to SessionLocal and the get_db
+dependency override. Background workers are not started.
+
+Routes that consume what they act on (registering, deleting) get a fresh
+email or id for every request. Routes that hash a password with bcrypt are
+dominated by it and run --slow-number times.
+
+Usage:
+    python -m benchmarks.routers [--number N] [--slow-number N]
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import timeit
+
+from tests.harness import PASSWORD, in_memory_database, make_user, test_client
+from database import models
+from database.db import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.routers")
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--slow-number", type=int, default=20)
+    args = parser.parse_args()
+
+    with in_memory_database(), test_client() as client:
+        db = SessionLocal()
+        admin, headers = make_user(db, "admin@example.com", "admin")
+        user, _ = make_user(db, "user@example.com")
+        admin_id, user_id = admin.id, user.id
+        # two are deleted up front, the rest once each by DELETE /users/{id}
+        # (one warm-up request plus the timed ones)
+        victims = [models.User(email=f"victim{i}@example.com", role="user") for i in range(args.number + 3)]
+        db.add_all(victims)
+        db.commit()
+        victim_ids = iter([victim.id for victim in victims])
+        db.close()
+
+        blog = {"title": "Title", "body": "body " * 200, "user_id": "ignored"}
+        blog_id = client.post("/blog", json=blog, headers=headers).json()["id"]
+        blog_ids = iter([client.post("/blog", json=blog, headers=headers).json()["id"] for _ in range(args.number + 1)])
+        client.delete(f"/users/{next(victim_ids)}", headers=headers)
+        deleted_id = next(victim_ids)
+        client.delete(f"/users/{deleted_id}", headers=headers)
+        emails = (f"new{i}@example.com" for i in itertools.count())
+
+        routes = [
+            ("POST /register", args.slow_number, lambda: client.post("/register", json={"email": next(emails), "password": PASSWORD, "role": "user"})),
+            ("POST /token", args.slow_number, lambda: client.post("/token", data={"username": "admin@example.com", "password": PASSWORD})),
+            ("POST /logout", args.number, lambda: client.post("/logout", headers=headers)),
+            ("GET /", args.number, lambda: client.get("/")),
+            ("GET /users/me", args.number, lambda: client.get("/users/me", headers=headers)),
+            ("PUT /users/me", args.slow_number, lambda: client.put("/users/me", json={"id": str(admin_id), "role": "admin", "email": "admin@example.com", "password": PASSWORD}, headers=headers)),
+            ("GET /users", args.number, lambda: client.get("/users", headers=headers)),
+            ("GET /users/{id}", args.number, lambda: client.get(f"/users/{user_id}", headers=headers)),
+            ("PUT /users/{id}", args.number, lambda: client.put(f"/users/{user_id}", json={"id": str(user_id), "email": "user@example.com", "is_active": False, "role": "user"}, headers=headers)),
+            ("DELETE /users/{id}", args.number, lambda: client.delete(f"/users/{next(victim_ids)}", headers=headers)),
+            ("GET /users/{id}/deletion", args.number, lambda: client.get(f"/users/{deleted_id}/deletion", headers=headers)),
+            ("POST /blog", args.number, lambda: client.post("/blog", json=blog, headers=headers)),
+            ("GET /blog/{id}", args.number, lambda: client.get(f"/blog/{blog_id}", headers=headers)),
+            ("PUT /blog/{id}", args.number, lambda: client.put(f"/blog/{blog_id}", json=blog, headers=headers)),
+            ("DELETE /blog/{id}", args.number, lambda: client.delete(f"/blog/{next(blog_ids)}", headers=headers)),
+            ("GET /yourblogs", args.number, lambda: client.get("/yourblogs", headers=headers)),
+            ("GET /allblogs", args.number, lambda: client.get("/allblogs", headers=headers)),
+        ]
+        for label, number, request in routes:
+            status = request().status_code
+            # PUT /users/me prints the submitted and stored emails
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = timeit.timeit(request, number=number)
+            print(f"{label:<26} {status} {seconds / number * 1e3:8.3f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
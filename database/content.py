@@ -0,0 +1,128 @@
+import argparse
+import hashlib
+import os
+import sqlalchemy as sa
+from database.db import insert
+
+
+# Bodies longer than the threshold (in bytes) are stored zstd-compressed in the
+# blog_contents table, keyed by their SHA-256 so identical bodies are stored once.
+BODY_COMPRESSION = os.getenv('BLOG_BODY_COMPRESSION', 'false').lower() in ('1', 'true', 'yes')
+BODY_COMPRESSION_THRESHOLD = int(os.getenv('BLOG_BODY_COMPRESSION_THRESHOLD', '4096'))
+BODY_COMPRESSION_LEVEL = int(os.getenv('BLOG_BODY_COMPRESSION_LEVEL', '3'))
+
+
+def should_compress(body: str) -> bool:
+    return BODY_COMPRESSION and body is not None and len(body.encode()) > BODY_COMPRESSION_THRESHOLD
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def compress(body: str) -> bytes:
+    # zstandard is only needed when compression is enabled
+    import zstandard
+    return zstandard.ZstdCompressor(level=BODY_COMPRESSION_LEVEL).compress(body.encode())
+
+
+def decompress(data: bytes) -> str:
+    import zstandard
+    return zstandard.ZstdDecompressor().decompress(data).decode()
+
+
+def upsert_content(connection, table, values: dict):
+    """
+    Inserts a blog_contents row, or touches the existing row with the same
+    hash. Either way the row stays locked until the caller commits, so
+    purge_unreferenced_contents() skips it while the blog referencing it is
+    not yet visible.
+    """
+    statement = insert(connection, table).values(**values)
+    connection.execute(statement.on_conflict_do_update(index_elements=['hash'], set_={'size': statement.excluded.size}))
+
+
+blogs_table = sa.table('blogs',
+    sa.column('id', sa.Uuid()),
+    sa.column('body', sa.String()),
+    sa.column('body_hash', sa.String()),
+)
+blog_contents_table = sa.table('blog_contents',
+    sa.column('hash', sa.String()),
+    sa.column('data', sa.LargeBinary()),
+    sa.column('size', sa.Integer()),
+)
+
+
+def compress_existing_bodies(connection, batch_size: int = 500, commit: bool = False) -> int:
+    """
+    Moves stored plain bodies above BODY_COMPRESSION_THRESHOLD into
+    blog_contents, walking the blogs in id order in batches. With `commit`
+    every batch is committed on its own, so the backfill can be stopped and
+    rerun at any point. Returns the number of moved bodies.
+    """
+    moved = 0
+    last_id = None
+    while True:
+        # a UTF-8 character is at most 4 bytes, so the portable character
+        # length gives a lower bound; the exact byte size is checked below
+        query = sa.select(blogs_table.c.id, blogs_table.c.body).where(
+            blogs_table.c.body_hash.is_(None),
+            sa.func.length(blogs_table.c.body) > BODY_COMPRESSION_THRESHOLD // 4,
+        ).order_by(blogs_table.c.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(blogs_table.c.id > last_id)
+        rows = connection.execute(query).all()
+        if not rows:
+            return moved
+        for id, body in rows:
+            if len(body.encode()) <= BODY_COMPRESSION_THRESHOLD:
+                continue
+            digest = content_hash(body)
+            upsert_content(connection, blog_contents_table, {"hash": digest, "data": compress(body), "size": len(body.encode())})
+            connection.execute(blogs_table.update().where(blogs_table.c.id == id).values(body=None, body_hash=digest))
+            moved += 1
+        if commit:
+            connection.commit()
+        last_id = rows[-1].id
+
+
+def purge_unreferenced_contents(connection, batch_size: int = 500, commit: bool = False) -> int:
+    """
+    Deletes blog_contents rows no blog references any more (after blogs were
+    deleted or their bodies edited), in batches. Rows locked by a transaction
+    that is about to reference them are skipped. Returns the number of
+    deleted rows.
+    """
+    deleted = 0
+    while True:
+        unreferenced = sa.select(blog_contents_table.c.hash).where(
+            ~sa.exists().where(blogs_table.c.body_hash == blog_contents_table.c.hash)
+        ).limit(batch_size).with_for_update(skip_locked=True)
+        count = connection.execute(
+            blog_contents_table.delete().where(blog_contents_table.c.hash.in_(unreferenced.scalar_subquery()))
+        ).rowcount
+        if commit:
+            connection.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m database.content", description="Compress existing blog bodies above the size threshold.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--purge", action="store_true", help="delete unreferenced contents instead")
+    args = parser.parse_args()
+
+    from database.db import engine
+    with engine.connect() as connection:
+        if args.purge:
+            print(f"deleted {purge_unreferenced_contents(connection, args.batch_size, commit=True)} unreferenced contents")
+            return
+        moved = compress_existing_bodies(connection, args.batch_size, commit=True)
+    print(f"compressed {moved} blog bodies")
+
+
+if __name__ == "__main__":
+    main()
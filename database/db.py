@@ -1,22 +1,59 @@
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os 
 
 load_dotenv()
 
 POSTGRESQL_DATABASE_URL = os.getenv('POSTGRESQL_DATABASE_URL')
+# DATABASE_URL=sqlite:// runs the app against a throwaway in-memory database
+DATABASE_URL = os.getenv('DATABASE_URL') or POSTGRESQL_DATABASE_URL
 
-engine = create_engine(POSTGRESQL_DATABASE_URL,echo=False)
+Base = declarative_base()
 
-SessionLocal = sessionmaker(autoflush=False, autocommit = False, bind = engine)
+IN_MEMORY_URLS = ("sqlite://", "sqlite:///:memory:")
 
-Base = declarative_base()
+
+def create_db_engine(url: str = DATABASE_URL):
+    """
+    Creates the engine for the given database URL.
+
+    An in-memory SQLite URL ("sqlite://" or "sqlite:///:memory:") gets a single
+    connection shared by the whole pool, so every session sees the same
+    database, and the schema is created from Base.metadata. This lets tests
+    and benchmarks run the routers without a Postgres server.
+    """
+    if url in IN_MEMORY_URLS:
+        engine = create_engine(url, echo=False, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        # the models register their tables on Base when imported
+        from database import models
+        Base.metadata.create_all(engine)
+        return engine
+    return create_engine(url, echo=False)
+
+
+def insert(bind, table):
+    """
+    Returns an INSERT supporting on_conflict_do_nothing for the dialect of the
+    given engine or connection.
+    """
+    dialect = sqlite if bind.dialect.name == "sqlite" else postgresql
+    return dialect.insert(table)
+
+
+engine = create_db_engine()
+# the in-memory database is a single connection shared by all sessions, so
+# background workers, which run in threads, must not use it
+IN_MEMORY_DATABASE = DATABASE_URL in IN_MEMORY_URLS
+
+SessionLocal = sessionmaker(autoflush=False, autocommit = False, bind = engine)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
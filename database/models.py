@@ -1,24 +1,118 @@
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer, LargeBinary, Index, Uuid, event, text
+from sqlalchemy.orm import relationship, deferred
 from database.db import Base    
-from sqlalchemy.dialects.postgresql import UUID
+from database import content
 from datetime import datetime
 import uuid
 class User(Base):
     __tablename__ = "users"
-    id = Column(UUID(as_uuid=True), primary_key=True,default=uuid.uuid4, index=True)
+    id = Column(Uuid(as_uuid=True), primary_key=True,default=uuid.uuid4, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     role = Column(String)
     is_active = Column(Boolean, default=False)
+    deleted_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now)
 
 
+class UserPurge(Base):
+    __tablename__ = "user_purges"
+    user_id = Column(Uuid(as_uuid=True), primary_key=True)
+    status = Column(String, default="pending", index=True)
+    blogs_deleted = Column(Integer, default=0)
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class BlogContent(Base):
+    __tablename__ = "blog_contents"
+    hash = Column(String, primary_key=True)
+    data = Column(LargeBinary)
+    size = Column(Integer)
+
+
 class Blog(Base):
     __tablename__ = "blogs"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     title = Column(String)
-    body = Column(String)
-    user_id = Column(UUID(as_uuid=True),default="user")
+    # large bodies live compressed in blog_contents; see the `body` property
+    _body = deferred(Column("body", String))
+    body_hash = Column(String, nullable=True, index=True)
+    content = relationship(BlogContent, primaryjoin="foreign(Blog.body_hash) == BlogContent.hash", viewonly=True)
+    user_id = Column(Uuid(as_uuid=True),default="user", index=True)
+    word_count = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now)  
+
+    @property
+    def body(self):
+        """
+        The blog body. Plain bodies are loaded on first access; compressed
+        ones are fetched from blog_contents and decompressed on first access.
+        """
+        if self.body_hash is None:
+            return self._body
+        cached = self.__dict__.get("_decoded_body")
+        if cached is None or cached[0] != self.body_hash:
+            cached = (self.body_hash, content.decompress(self.content.data))
+            self.__dict__["_decoded_body"] = cached
+        return cached[1]
+
+    @body.setter
+    def body(self, value):
+        if not content.should_compress(value):
+            self._body = value
+            self.body_hash = None
+            return
+        digest = content.content_hash(value)
+        self.__dict__["_decoded_body"] = (digest, value)
+        if digest != self.body_hash:
+            self.__dict__["_pending_content"] = digest
+            self.body_hash = digest
+            self._body = None
+
+
+@event.listens_for(Blog, "before_insert")
+@event.listens_for(Blog, "before_update")
+def _store_blog_content(mapper, connection, target):
+    digest = target.__dict__.pop("_pending_content", None)
+    if digest is None or digest != target.body_hash:
+        return
+    body = target.__dict__["_decoded_body"][1]
+    data = content.compress(body)
+    content.upsert_content(connection, BlogContent.__table__, {"hash": digest, "data": data, "size": len(body.encode())})
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String)
+    response = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String)
+    payload = Column(Text)
+    dedup_key = Column(String, nullable=True)
+    status = Column(String, default="queued")
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_at = Column(DateTime, default=datetime.now)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now)  
\ No newline at end of file
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True, index=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # at most one queued job per dedup key
+        Index("ix_jobs_dedup_key", "dedup_key", unique=True, postgresql_where=text("status = 'queued'"), sqlite_where=text("status = 'queued'")),
+    )
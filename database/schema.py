@@ -40,6 +40,14 @@ class UpdateUser(BaseModel):
     class Config:
         from_attributes = True
 
+class UserPurgeResponse(BaseModel):
+    user_id: UUID
+    status: str
+    blogs_deleted: int
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime]
+
 class Blog(BaseModel):
     title: str
     body: str
@@ -0,0 +1,39 @@
+"""
+Runs job workers outside the web app.
+
+Usage:
+    python -m jobs [--workers N]
+    python -m jobs stats
+
+Running workers also purges finished jobs past JOB_RETENTION_DAYS.
+"""
+import argparse
+import asyncio
+import json
+import jobs.tasks
+from database.db import SessionLocal
+from jobs.queue import JOB_WORKERS, job_metrics, job_retention_job, job_worker
+
+
+async def run_workers(count: int):
+    await asyncio.gather(job_retention_job(), *(job_worker() for _ in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m jobs")
+    parser.add_argument("command", nargs="?", choices=["worker", "stats"], default="worker")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        db = SessionLocal()
+        try:
+            print(json.dumps(job_metrics(db), indent=2))
+        finally:
+            db.close()
+        return
+    asyncio.run(run_workers(args.workers))
+
+
+if __name__ == "__main__":
+    main()
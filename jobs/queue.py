@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.orm import Session
+from database import models
+from database.db import SessionLocal, insert
+
+
+# set RUN_JOB_WORKERS=false when workers run separately via `python -m jobs`
+RUN_JOB_WORKERS = os.getenv('RUN_JOB_WORKERS', 'true').lower() in ('1', 'true', 'yes')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '1'))
+JOB_POLL_INTERVAL = 1
+JOB_LEASE = timedelta(minutes=5)
+JOB_BACKOFF_BASE = 2
+JOB_BACKOFF_MAX = timedelta(hours=1)
+JOB_RETENTION = timedelta(days=int(os.getenv('JOB_RETENTION_DAYS', '7')))
+JOB_PURGE_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+_handlers: Dict[str, Callable[[Session, dict], None]] = {}
+
+
+def job(name: str):
+    """
+    Registers the decorated function as the handler for jobs called `name`.
+    Handlers are called with a database session and the job payload, and
+    signal failure by raising.
+    """
+    def register(handler):
+        _handlers[name] = handler
+        return handler
+    return register
+
+
+def enqueue(db: Session, name: str, payload: dict, dedup_key: Optional[str] = None, max_attempts: int = 5):
+    """
+    Adds a job to the queue in the caller's transaction, so it is only visible
+    to workers once the caller commits.
+
+    If `dedup_key` is given and a job with that key is still queued, no new job
+    is added; a job already running does not count, since it may have read the
+    data before the change that triggered this enqueue.
+    """
+    now = datetime.now()
+    statement = insert(db.get_bind(), models.Job.__table__).values(
+        id=uuid.uuid4(),
+        name=name,
+        payload=json.dumps(payload, default=str),
+        dedup_key=dedup_key,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=now,
+        created_at=now,
+    )
+    if dedup_key is not None:
+        statement = statement.on_conflict_do_nothing(index_elements=["dedup_key"], index_where=text("status = 'queued'"))
+    db.execute(statement)
+
+
+def _claim_job(db: Session):
+    """
+    Takes the next due job with SELECT ... FOR UPDATE SKIP LOCKED, so
+    concurrent workers never block on or run the same job. Running jobs whose
+    lease expired (their worker died) are picked up again.
+    """
+    now = datetime.now()
+    claimed = (
+        db.query(models.Job)
+        .filter(or_(
+            and_(models.Job.status == "queued", models.Job.run_at <= now),
+            and_(models.Job.status == "running", models.Job.locked_until < now),
+        ))
+        .order_by(models.Job.run_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if claimed is None:
+        db.rollback()
+        return None
+    claimed.status = "running"
+    claimed.attempts += 1
+    claimed.started_at = now
+    claimed.locked_until = now + JOB_LEASE
+    db.commit()
+    return claimed
+
+
+def _is_superseded(db: Session, claimed: models.Job) -> bool:
+    # a job enqueued with the same dedup key while this one ran will redo the work
+    if claimed.dedup_key is None:
+        return False
+    return db.query(models.Job.id).filter(
+        models.Job.dedup_key == claimed.dedup_key,
+        models.Job.status == "queued",
+        models.Job.id != claimed.id,
+    ).first() is not None
+
+
+def backoff(attempts: int) -> timedelta:
+    return min(timedelta(seconds=JOB_BACKOFF_BASE ** attempts), JOB_BACKOFF_MAX)
+
+
+def run_next_job() -> bool:
+    """
+    Claims and runs a single job in its own session.
+    Returns False when no job was due.
+    """
+    db = SessionLocal()
+    try:
+        claimed = _claim_job(db)
+        if claimed is None:
+            return False
+        started = datetime.now()
+        try:
+            handler = _handlers.get(claimed.name)
+            if handler is None:
+                raise LookupError(f"No handler registered for job {claimed.name!r}")
+            handler(db, json.loads(claimed.payload))
+        except Exception:
+            db.rollback()
+            logger.exception("Job %s (%s) failed on attempt %s", claimed.id, claimed.name, claimed.attempts)
+            claimed.last_error = traceback.format_exc()
+            if claimed.attempts < claimed.max_attempts and _is_superseded(db, claimed):
+                claimed.status = "superseded"
+                claimed.finished_at = datetime.now()
+            elif claimed.attempts < claimed.max_attempts:
+                claimed.status = "queued"
+                claimed.run_at = datetime.now() + backoff(claimed.attempts)
+            else:
+                claimed.status = "failed"
+                claimed.finished_at = datetime.now()
+        else:
+            claimed.status = "done"
+            claimed.finished_at = datetime.now()
+        claimed.locked_until = None
+        claimed.duration_ms = int((datetime.now() - started).total_seconds() * 1000)
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+async def _run_to_completion(function):
+    """
+    Runs `function` in a thread. If the caller is cancelled meanwhile, waits
+    for the thread to finish (e.g. a job mid-commit) before re-raising.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(function))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+async def job_worker():
+    """
+    Runs queued jobs until cancelled. Each job runs in a thread so handlers'
+    blocking database calls do not hold up the event loop; a job that is
+    running when the worker is cancelled finishes first.
+    """
+    while True:
+        try:
+            ran = await _run_to_completion(run_next_job)
+        except Exception:
+            logger.exception("Job worker failed to run a job")
+            ran = False
+        if not ran:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+def purge_finished_jobs(db: Session) -> int:
+    """
+    Deletes done, failed and superseded jobs that finished more than
+    JOB_RETENTION ago, in batches of JOB_PURGE_BATCH_SIZE so no single
+    transaction grows large. Returns the number of deleted jobs.
+    """
+    cutoff = datetime.now() - JOB_RETENTION
+    deleted = 0
+    while True:
+        batch = db.query(models.Job.id).filter(
+            models.Job.status.in_(("done", "failed", "superseded")),
+            models.Job.finished_at < cutoff,
+        ).limit(JOB_PURGE_BATCH_SIZE)
+        count = db.query(models.Job).filter(models.Job.id.in_(batch.scalar_subquery())).delete(synchronize_session=False)
+        db.commit()
+        deleted += count
+        if count < JOB_PURGE_BATCH_SIZE:
+            return deleted
+
+
+def _run_retention():
+    db = SessionLocal()
+    try:
+        purge_finished_jobs(db)
+    finally:
+        db.close()
+
+
+async def job_retention_job(interval: float = 3600):
+    """
+    Periodically purges finished jobs past JOB_RETENTION, in a thread so the
+    deletes do not block request handling.
+    """
+    while True:
+        try:
+            await _run_to_completion(_run_retention)
+        except Exception:
+            logger.exception("Purging finished jobs failed")
+        await asyncio.sleep(interval)
+
+
+def job_metrics(db: Session):
+    """
+    Returns, per job name and status, the number of jobs, the total attempts
+    and the average and maximum run time in milliseconds.
+    """
+    rows = (
+        db.query(
+            models.Job.name,
+            models.Job.status,
+            func.count(models.Job.id),
+            func.sum(models.Job.attempts),
+            func.avg(models.Job.duration_ms),
+            func.max(models.Job.duration_ms),
+        )
+        .group_by(models.Job.name, models.Job.status)
+        .order_by(models.Job.name, models.Job.status)
+        .all()
+    )
+    return [
+        {"name": name, "status": status, "jobs": count, "attempts": attempts or 0,
+         "avg_duration_ms": float(avg) if avg is not None else None, "max_duration_ms": max_ms}
+        for name, status, count, attempts, avg, max_ms in rows
+    ]
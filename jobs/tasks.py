@@ -0,0 +1,25 @@
+import uuid
+from sqlalchemy.orm import Session
+from database import content, models
+from jobs.queue import job
+
+
+@job("count_words")
+def count_words(db: Session, payload: dict):
+    """
+    Stores the number of words in a blog's body.
+    """
+    blog = db.query(models.Blog).filter(models.Blog.id == uuid.UUID(payload["blog_id"])).first()
+    if blog is None:
+        return
+    blog.word_count = len((blog.body or "").split())
+    db.commit()
+
+
+@job("purge_blog_contents")
+def purge_blog_contents(db: Session, payload: dict):
+    """
+    Deletes compressed bodies no blog references any more.
+    """
+    with db.get_bind().connect() as connection:
+        content.purge_unreferenced_contents(connection, commit=True)
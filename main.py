@@ -1,10 +1,42 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware  
 from auth.auth import auth_router
 from api.blog import blog_router
 from api.users import user_router
+from api.idempotency import idempotency_cleanup_job
+from api.user_purge import user_purge_worker
+from database.db import IN_MEMORY_DATABASE
+from jobs.queue import JOB_WORKERS, RUN_JOB_WORKERS, job_retention_job, job_worker
+import jobs.tasks
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = []
+    if not IN_MEMORY_DATABASE:
+        background_tasks += [
+            asyncio.create_task(idempotency_cleanup_job()),
+            asyncio.create_task(user_purge_worker()),
+        ]
+        if RUN_JOB_WORKERS:
+            background_tasks.append(asyncio.create_task(job_retention_job()))
+            background_tasks += [asyncio.create_task(job_worker()) for _ in range(JOB_WORKERS)]
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # wait for the tasks to stop, including any job thread finishing its commit
+    results = await asyncio.gather(*background_tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Background task failed during shutdown", exc_info=result)
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 async def root():
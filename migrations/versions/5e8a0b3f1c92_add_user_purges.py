@@ -0,0 +1,42 @@
+"""Add user purges
+
+Revision ID: 5e8a0b3f1c92
+Revises: 9c41f7a2d6e3
+Create Date: 2026-10-19 12:21:09.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a0b3f1c92'
+down_revision: Union[str, None] = '9c41f7a2d6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_purges',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('blogs_deleted', sa.Integer(), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_purges_status'), 'user_purges', ['status'], unique=False)
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # lets each purge batch find the user's blogs without scanning the table
+    op.create_index(op.f('ix_blogs_user_id'), 'blogs', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blogs_user_id'), table_name='blogs')
+    op.drop_column('users', 'deleted_at')
+    op.drop_index(op.f('ix_user_purges_status'), table_name='user_purges')
+    op.drop_table('user_purges')
@@ -0,0 +1,44 @@
+"""Add blog contents
+
+Revision ID: 9c41f7a2d6e3
+Revises: 3b9d2c4e8a17
+Create Date: 2026-10-19 11:04:27.552913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from database import content
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41f7a2d6e3'
+down_revision: Union[str, None] = '3b9d2c4e8a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blog_contents',
+    sa.Column('hash', sa.String(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    op.add_column('blogs', sa.Column('body_hash', sa.String(), nullable=True))
+
+    # bodies can also be moved later, after enabling compression, with
+    # `python -m database.content`
+    if content.BODY_COMPRESSION:
+        content.compress_existing_bodies(op.get_bind())
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    blogs, blog_contents = content.blogs_table, content.blog_contents_table
+    for digest, data in connection.execute(sa.select(blog_contents.c.hash, blog_contents.c.data)):
+        connection.execute(blogs.update().where(blogs.c.body_hash == digest).values(body=content.decompress(data), body_hash=None))
+    op.drop_column('blogs', 'body_hash')
+    op.drop_table('blog_contents')
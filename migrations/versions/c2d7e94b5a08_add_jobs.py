@@ -0,0 +1,48 @@
+"""Add jobs
+
+Revision ID: c2d7e94b5a08
+Revises: 5e8a0b3f1c92
+Create Date: 2026-10-19 13:47:52.116730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7e94b5a08'
+down_revision: Union[str, None] = '5e8a0b3f1c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('dedup_key', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('max_attempts', sa.Integer(), nullable=True),
+    sa.Column('run_at', sa.DateTime(), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_run_at', 'jobs', ['status', 'run_at'], unique=False)
+    op.create_index('ix_jobs_dedup_key', 'jobs', ['dedup_key'], unique=True, postgresql_where=sa.text("status = 'queued'"))
+    op.add_column('blogs', sa.Column('word_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('blogs', 'word_count')
+    op.drop_index('ix_jobs_dedup_key', table_name='jobs')
+    op.drop_index('ix_jobs_status_run_at', table_name='jobs')
+    op.drop_table('jobs')
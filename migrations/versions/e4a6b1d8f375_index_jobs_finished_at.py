@@ -0,0 +1,26 @@
+"""Index jobs finished_at
+
+Revision ID: e4a6b1d8f375
+Revises: c2d7e94b5a08
+Create Date: 2026-10-20 09:31:05.270118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a6b1d8f375'
+down_revision: Union[str, None] = 'c2d7e94b5a08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_jobs_finished_at'), 'jobs', ['finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_jobs_finished_at'), table_name='jobs')
@@ -0,0 +1,26 @@
+"""Index blogs body_hash
+
+Revision ID: f1b3c5d7e9a2
+Revises: e4a6b1d8f375
+Create Date: 2026-10-21 10:02:44.618530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b3c5d7e9a2'
+down_revision: Union[str, None] = 'e4a6b1d8f375'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_blogs_body_hash'), 'blogs', ['body_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blogs_body_hash'), table_name='blogs')
@@ -0,0 +1,38 @@
+import pytest
+
+from tests import harness
+from database.db import SessionLocal
+
+
+@pytest.fixture
+def engine():
+    """
+    A fresh in-memory database per test, see harness.in_memory_database.
+    """
+    with harness.in_memory_database() as engine:
+        yield engine
+
+
+@pytest.fixture
+def db(engine):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(engine):
+    with harness.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def password():
+    return harness.PASSWORD
+
+
+@pytest.fixture
+def make_user(db):
+    def make(email: str = "user@example.com", role: str = "user"):
+        return harness.make_user(db, email, role)
+    return make
@@ -0,0 +1,77 @@
+"""
+In-memory database harness shared by the test fixtures in conftest.py and
+by benchmarks/routers.py, so both exercise the routers the same way.
+"""
+import os
+
+# must be set before the app is imported: database.db creates its engine on import
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+from api import idempotency
+from auth import auth
+from database import models
+from database.db import SessionLocal, create_db_engine, get_db
+from main import app
+
+PASSWORD = "secret"
+_password_hash = None
+
+
+@contextmanager
+def in_memory_database():
+    """
+    Creates a fresh in-memory database and rebinds SessionLocal to it, so code
+    opening its own sessions (workers, jobs) uses the same database.
+    """
+    engine = create_db_engine("sqlite://")
+    previous = SessionLocal.kw["bind"]
+    SessionLocal.configure(bind=engine)
+    try:
+        yield engine
+    finally:
+        SessionLocal.configure(bind=previous)
+        engine.dispose()
+
+
+@contextmanager
+def test_client():
+    """
+    A TestClient whose get_db dependency is overridden to use SessionLocal.
+    It is not entered as a context manager, so the lifespan background
+    workers are not started.
+    """
+    def override_get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    idempotency._cache.clear()
+    auth._token_cache.clear()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def make_user(db, email: str = "user@example.com", role: str = "user"):
+    """
+    Creates a user directly in the database and returns it with the
+    Authorization header for a token of theirs. The bcrypt hash of PASSWORD
+    is computed once per run to keep tests fast.
+    """
+    global _password_hash
+    if _password_hash is None:
+        _password_hash = auth.get_password_hash(PASSWORD)
+    user = models.User(email=email, hashed_password=_password_hash, role=role)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    token = auth.create_access_token({"sub": email})
+    return user, {"Authorization": f"Bearer {token}"}
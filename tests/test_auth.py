@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from auth import auth
+
+USER = {"email": "new@example.com", "password": "pw", "role": "user"}
+
+
+def test_register(client):
+    response = client.post("/register", json=USER)
+    assert response.status_code == 201
+    assert response.json()["email"] == USER["email"]
+    assert "hashed_password" not in response.json()
+
+
+def test_register_duplicate_email(client):
+    client.post("/register", json=USER)
+    assert client.post("/register", json=USER).status_code == 400
+
+
+def test_register_idempotency_key_replays_response(client):
+    headers = {"Idempotency-Key": "abc"}
+    first = client.post("/register", json=USER, headers=headers)
+    retry = client.post("/register", json=USER, headers=headers)
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+
+
+def test_register_idempotency_key_reused_for_other_payload(client):
+    headers = {"Idempotency-Key": "abc"}
+    client.post("/register", json=USER, headers=headers)
+    response = client.post("/register", json={**USER, "role": "admin"}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_login(client, make_user, password):
+    make_user("a@example.com")
+    response = client.post("/token", data={"username": "a@example.com", "password": password})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+
+def test_login_wrong_password(client, make_user):
+    make_user("a@example.com")
+    response = client.post("/token", data={"username": "a@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_invalid_token(client):
+    response = client.get("/users/me", headers={"Authorization": "Bearer nope"})
+    assert response.status_code == 401
+
+
+def test_logout(client, make_user):
+    _, headers = make_user()
+    assert client.post("/logout", headers=headers).status_code == 200
+
+
+def test_decoded_token_is_cached():
+    token = auth.create_access_token({"sub": "a@example.com"})
+    assert auth.decode_access_token(token)["sub"] == "a@example.com"
+    assert hashlib.sha256(token.encode()).hexdigest() in auth._token_cache
+
+
+def test_deleted_user_cannot_authenticate(client, db, make_user):
+    user, headers = make_user()
+    user.deleted_at = datetime.now()
+    db.commit()
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+
+def write_key(directory, kid, keys):
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    path = directory / f"{kid}.pem"
+    path.write_bytes(private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    jwk = json.loads(jwt.algorithms.OKPAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "EdDSA", "use": "sig"})
+    keys.append(jwk)
+    (directory / "jwks.json").write_text(json.dumps({"keys": keys}))
+    return path
+
+
+@pytest.fixture
+def eddsa(monkeypatch, tmp_path):
+    monkeypatch.setattr(auth, "ALGORITHM", "EdDSA")
+    monkeypatch.setattr(auth, "JWKS_FILE", str(tmp_path / "jwks.json"))
+    monkeypatch.setattr(auth, "_jwks", None)
+    monkeypatch.setattr(auth, "_private_key", None)
+    auth._token_cache.clear()
+    return tmp_path
+
+
+def test_eddsa_token_verified_with_jwks(eddsa, monkeypatch):
+    keys = []
+    monkeypatch.setattr(auth, "JWT_PRIVATE_KEY_FILE", str(write_key(eddsa, "k1", keys)))
+    monkeypatch.setattr(auth, "JWT_SIGNING_KID", "k1")
+    token = auth.create_access_token({"sub": "a@example.com"})
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    assert auth.decode_access_token(token)["sub"] == "a@example.com"
+
+
+def test_rotated_key_is_picked_up_without_restart(eddsa, monkeypatch):
+    keys = []
+    monkeypatch.setattr(auth, "JWT_PRIVATE_KEY_FILE", str(write_key(eddsa, "k1", keys)))
+    monkeypatch.setattr(auth, "JWT_SIGNING_KID", "k1")
+    auth.decode_access_token(auth.create_access_token({"sub": "a@example.com"}))
+
+    monkeypatch.setattr(auth, "JWT_PRIVATE_KEY_FILE", str(write_key(eddsa, "k2", keys)))
+    monkeypatch.setattr(auth, "JWT_SIGNING_KID", "k2")
+    monkeypatch.setattr(auth, "_private_key", None)
+    monkeypatch.setattr(auth, "_jwks_checked_at", 0.0)
+    token = auth.create_access_token({"sub": "a@example.com"})
+    assert auth.decode_access_token(token)["sub"] == "a@example.com"
+
+
+def test_cached_token_rejected_after_key_removed(eddsa, monkeypatch):
+    keys = []
+    monkeypatch.setattr(auth, "JWT_PRIVATE_KEY_FILE", str(write_key(eddsa, "k1", keys)))
+    monkeypatch.setattr(auth, "JWT_SIGNING_KID", "k1")
+    token = auth.create_access_token({"sub": "a@example.com"})
+    auth.decode_access_token(token)
+
+    # rotate k1 out: the JWKS now only lists k2
+    write_key(eddsa, "k2", [])
+    stat = os.stat(eddsa / "jwks.json")
+    os.utime(eddsa / "jwks.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    monkeypatch.setattr(auth, "_jwks_checked_at", 0.0)
+    with pytest.raises(jwt.PyJWTError):
+        auth.decode_access_token(token)
+
+
+def test_unknown_kid_rejected(eddsa, monkeypatch):
+    keys = []
+    write_key(eddsa, "k1", keys)
+    other = write_key(eddsa.parent, "other", [])
+    monkeypatch.setattr(auth, "JWT_PRIVATE_KEY_FILE", str(other))
+    monkeypatch.setattr(auth, "JWT_SIGNING_KID", "other")
+    token = auth.create_access_token({"sub": "a@example.com"})
+    with pytest.raises(jwt.PyJWTError):
+        auth.decode_access_token(token)
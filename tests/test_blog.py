@@ -0,0 +1,127 @@
+import uuid
+
+from database import content, models
+from jobs import queue
+import jobs.tasks
+
+BLOG = {"title": "Title", "body": "one two three", "user_id": "ignored"}
+
+
+def create_blog(client, headers, blog=BLOG):
+    response = client.post("/blog", json=blog, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_create_and_read_blog(client, make_user):
+    _, headers = make_user()
+    id = create_blog(client, headers)
+    response = client.get(f"/blog/{id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == id
+
+
+def test_read_missing_blog(client, make_user):
+    _, headers = make_user()
+    assert client.get(f"/blog/{uuid.uuid4()}", headers=headers).status_code == 404
+
+
+def test_read_blog_invalid_id(client, make_user):
+    _, headers = make_user()
+    assert client.get("/blog/not-a-uuid", headers=headers).status_code == 422
+
+
+def test_your_blogs(client, make_user):
+    _, headers = make_user("a@example.com")
+    _, other = make_user("b@example.com")
+    create_blog(client, headers)
+    create_blog(client, other)
+    assert len(client.get("/yourblogs", headers=headers).json()) == 1
+
+
+def test_all_blogs_requires_moderator(client, make_user):
+    _, headers = make_user("a@example.com")
+    _, moderator = make_user("m@example.com", "moderator")
+    create_blog(client, headers)
+    assert client.get("/allblogs", headers=headers).status_code == 401
+    assert len(client.get("/allblogs", headers=moderator).json()) == 1
+
+
+def test_update_blog(client, db, make_user):
+    _, headers = make_user()
+    id = create_blog(client, headers)
+    response = client.put(f"/blog/{id}", json={**BLOG, "title": "New"}, headers=headers)
+    assert response.status_code == 200
+    assert db.get(models.Blog, uuid.UUID(id)).title == "New"
+
+
+def test_update_blog_of_other_user(client, make_user):
+    _, owner = make_user("a@example.com")
+    _, other = make_user("b@example.com")
+    id = create_blog(client, owner)
+    assert client.put(f"/blog/{id}", json=BLOG, headers=other).status_code == 401
+
+
+def test_delete_blog(client, make_user):
+    _, headers = make_user()
+    id = create_blog(client, headers)
+    assert client.delete(f"/blog/{id}", headers=headers).status_code == 200
+    assert client.get(f"/blog/{id}", headers=headers).status_code == 404
+
+
+def test_create_blog_idempotency_key(client, db, make_user):
+    _, headers = make_user()
+    headers = {**headers, "Idempotency-Key": "retry-1"}
+    first = client.post("/blog", json=BLOG, headers=headers)
+    retry = client.post("/blog", json=BLOG, headers=headers)
+    assert retry.json() == first.json()
+    assert db.query(models.Blog).count() == 1
+
+
+def test_word_count_job(client, db, make_user):
+    _, headers = make_user()
+    id = create_blog(client, headers)
+    assert queue.run_next_job()
+    db.expire_all()
+    assert db.get(models.Blog, uuid.UUID(id)).word_count == 3
+    assert db.query(models.Job).one().status == "done"
+
+
+def test_compressed_body(client, db, make_user, monkeypatch):
+    monkeypatch.setattr(content, "BODY_COMPRESSION", True)
+    monkeypatch.setattr(content, "BODY_COMPRESSION_THRESHOLD", 10)
+    _, headers = make_user()
+    body = "word " * 100
+    first = create_blog(client, headers, {**BLOG, "body": body})
+    second = create_blog(client, headers, {**BLOG, "body": body})
+    assert db.query(models.BlogContent).count() == 1
+    for id in (first, second):
+        blog = db.get(models.Blog, uuid.UUID(id))
+        assert blog.body_hash is not None
+        assert blog.body == body
+
+
+def run_jobs():
+    while queue.run_next_job():
+        pass
+
+
+def test_unreferenced_compressed_bodies_are_purged(client, db, make_user, monkeypatch):
+    monkeypatch.setattr(content, "BODY_COMPRESSION", True)
+    monkeypatch.setattr(content, "BODY_COMPRESSION_THRESHOLD", 10)
+    _, headers = make_user()
+    first = create_blog(client, headers, {**BLOG, "body": "word " * 100})
+    second = create_blog(client, headers, {**BLOG, "body": "word " * 100})
+    client.put(f"/blog/{first}", json={**BLOG, "body": "other " * 100}, headers=headers)
+    run_jobs()
+    # the shared body is still referenced by the second blog
+    assert db.query(models.BlogContent).count() == 2
+
+    client.put(f"/blog/{second}", json={**BLOG, "body": "other " * 100}, headers=headers)
+    run_jobs()
+    assert db.query(models.BlogContent).count() == 1
+
+    client.delete(f"/blog/{first}", headers=headers)
+    client.delete(f"/blog/{second}", headers=headers)
+    run_jobs()
+    assert db.query(models.BlogContent).count() == 0
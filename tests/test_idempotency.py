@@ -0,0 +1,58 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from api import idempotency
+from database import models
+from database.db import SessionLocal
+
+USER = {"email": "new@example.com", "password": "pw", "role": "user"}
+
+
+def claim(db, key, fingerprint="f", age=timedelta(0)):
+    db.add(models.IdempotencyKey(key=key, fingerprint=fingerprint, created_at=datetime.now() - age))
+    db.commit()
+
+
+def test_waiter_returns_response_of_first_request(db):
+    claim(db, "k")
+
+    async def finish_first_request():
+        await asyncio.sleep(0.2)
+        other = SessionLocal()
+        other.query(models.IdempotencyKey).update({"response": json.dumps({"id": 1})})
+        other.commit()
+        other.close()
+
+    async def wait():
+        finisher = asyncio.create_task(finish_first_request())
+        record = await idempotency._claim(db, "k", "f")
+        await finisher
+        return record
+
+    assert json.loads(asyncio.run(wait()).response) == {"id": 1}
+
+
+def test_waiter_gets_409_while_first_request_runs(db, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_TIMEOUT", 0.3)
+    claim(db, "k")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(idempotency._claim(db, "k", "f"))
+    assert error.value.status_code == 409
+    assert db.query(models.IdempotencyKey).count() == 1
+
+
+def test_abandoned_claim_is_taken_over(client, db):
+    fingerprint = idempotency.fingerprint("POST /register", {k: v for k, v in USER.items() if k != "password"})
+    key = hashlib.sha256(b"POST /register:abc").hexdigest()
+    claim(db, key, fingerprint, age=timedelta(seconds=idempotency.IDEMPOTENCY_CLAIM_GRACE + 1))
+
+    response = client.post("/register", json=USER, headers={"Idempotency-Key": "abc"})
+    assert response.status_code == 201
+    db.expire_all()
+    assert db.query(models.User).count() == 1
+    assert json.loads(db.get(models.IdempotencyKey, key).response) == response.json()
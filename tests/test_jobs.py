@@ -0,0 +1,74 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import models
+from jobs import queue
+
+
+def test_enqueue_deduplicates_queued_jobs(db):
+    queue.enqueue(db, "noop", {}, dedup_key="same")
+    queue.enqueue(db, "noop", {}, dedup_key="same")
+    queue.enqueue(db, "noop", {})
+    db.commit()
+    assert db.query(models.Job).count() == 2
+
+
+def test_failed_job_is_retried_with_backoff(db, monkeypatch):
+    calls = []
+
+    def fail(db, payload):
+        calls.append(payload)
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(queue._handlers, "fail", fail)
+    queue.enqueue(db, "fail", {"n": 1}, max_attempts=2)
+    db.commit()
+
+    assert queue.run_next_job()
+    db.expire_all()
+    failed = db.query(models.Job).one()
+    assert failed.status == "queued"
+    assert failed.run_at > datetime.now()
+    assert "boom" in failed.last_error
+
+    failed.run_at = datetime.now()
+    db.commit()
+    assert queue.run_next_job()
+    db.expire_all()
+    assert db.query(models.Job).one().status == "failed"
+    assert calls == [{"n": 1}, {"n": 1}]
+
+
+def test_purge_finished_jobs(db):
+    old = datetime.now() - queue.JOB_RETENTION - timedelta(days=1)
+    for status in ("done", "failed", "superseded", "queued"):
+        db.add(models.Job(name="noop", payload=json.dumps({}), status=status, finished_at=old))
+    db.add(models.Job(name="noop", payload=json.dumps({}), status="done", finished_at=datetime.now()))
+    db.commit()
+    assert queue.purge_finished_jobs(db) == 3
+    assert db.query(models.Job).count() == 2
+
+
+def test_cancelled_worker_waits_for_running_job(monkeypatch):
+    finished = []
+
+    def slow_job():
+        time.sleep(0.2)
+        finished.append(True)
+        return True
+
+    monkeypatch.setattr(queue, "run_next_job", slow_job)
+
+    async def cancel_worker():
+        worker = asyncio.create_task(queue.job_worker())
+        await asyncio.sleep(0.05)
+        worker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await worker
+        assert finished == [True]
+
+    asyncio.run(cancel_worker())
@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime, timedelta
+
+from api import user_purge
+from database import models
+
+
+def test_read_users_requires_admin(client, make_user):
+    _, headers = make_user("a@example.com")
+    _, admin = make_user("admin@example.com", "admin")
+    assert client.get("/users", headers=headers).status_code == 401
+    assert len(client.get("/users", headers=admin).json()) == 2
+
+
+def test_read_users_me(client, make_user):
+    _, headers = make_user("a@example.com")
+    assert client.get("/users/me", headers=headers).json()["email"] == "a@example.com"
+
+
+def test_read_user(client, make_user):
+    user, _ = make_user("a@example.com")
+    _, admin = make_user("admin@example.com", "admin")
+    response = client.get(f"/users/{user.id}", headers=admin)
+    assert response.status_code == 200
+    assert response.json()["email"] == "a@example.com"
+
+
+def test_update_user_me(client, make_user):
+    user, headers = make_user("a@example.com")
+    response = client.put("/users/me", json={"id": None, "role": None, "email": "b@example.com", "password": "pw"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "b@example.com"
+
+
+def test_update_user_role(client, make_user):
+    user, _ = make_user("a@example.com")
+    _, admin = make_user("admin@example.com", "admin")
+    body = {"email": "a@example.com", "id": str(user.id), "is_active": False, "role": "moderator"}
+    response = client.put(f"/users/{user.id}", json=body, headers=admin)
+    assert response.status_code == 200
+    assert response.json()["role"] == "moderator"
+
+
+def test_delete_user_purges_blogs_in_batches(client, db, make_user, monkeypatch):
+    monkeypatch.setattr(user_purge, "PURGE_BATCH_SIZE", 2)
+    user, headers = make_user("a@example.com")
+    _, admin = make_user("admin@example.com", "admin")
+    for _ in range(5):
+        client.post("/blog", json={"title": "t", "body": "b", "user_id": "x"}, headers=headers)
+
+    response = client.delete(f"/users/{user.id}", headers=admin)
+    assert response.status_code == 202
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert client.get(f"/users/{user.id}/deletion", headers=admin).json()["status"] == "pending"
+
+    assert client.get(f"/users/{user.id}", headers=admin).status_code == 404
+    body = {"email": "a@example.com", "id": str(user.id), "is_active": False, "role": "admin"}
+    assert client.put(f"/users/{user.id}", json=body, headers=admin).status_code == 404
+
+    lease = user_purge.run_purge_batch()
+    assert client.get(f"/users/{user.id}/deletion", headers=admin).json()["blogs_deleted"] == 2
+    while lease is not None:
+        lease = user_purge.run_purge_batch(lease)
+
+    status = client.get(f"/users/{user.id}/deletion", headers=admin).json()
+    assert status["status"] == "done"
+    assert status["blogs_deleted"] == 5
+    assert db.query(models.Blog).count() == 0
+    assert db.query(models.User).filter(models.User.id == user.id).first() is None
+
+
+def test_user_deletion_status_not_found(client, make_user):
+    _, admin = make_user("admin@example.com", "admin")
+    assert client.get(f"/users/{uuid.uuid4()}/deletion", headers=admin).status_code == 404
+
+
+def test_purge_stops_when_lease_is_lost(client, db, make_user, monkeypatch):
+    monkeypatch.setattr(user_purge, "PURGE_BATCH_SIZE", 1)
+    user, headers = make_user("a@example.com")
+    _, admin = make_user("admin@example.com", "admin")
+    for _ in range(3):
+        client.post("/blog", json={"title": "t", "body": "b", "user_id": "x"}, headers=headers)
+    client.delete(f"/users/{user.id}", headers=admin)
+
+    lease = user_purge.run_purge_batch()
+    # the lease ran out and another worker claimed the purge
+    db.query(models.UserPurge).update({"locked_until": datetime.now() + timedelta(minutes=5)})
+    db.commit()
+    assert user_purge.run_purge_batch(lease) is None
+    db.expire_all()
+    assert db.query(models.Blog).count() == 2